@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 from faker import Faker
 import random
 from datetime import datetime
@@ -84,6 +85,34 @@ def generate_core_tables(df_clean):
     return transactions, items, customers
 
 
+def assign_segment(r, f, m):
+    if r == 5 and f == 5 and m == 5:
+        return 'Champion'
+    elif r == 5:
+        return 'Recent Customer'
+    elif f == 5:
+        return 'Frequent Buyer'
+    elif m == 5:
+        return 'Big Spender'
+    elif r == 1:
+        return 'At Risk'
+    else:
+        return 'Others'
+
+
+# Segment of every possible (R, F, M) score, indexed by (R-1)*25 + (F-1)*5 + (M-1)
+SEGMENT_LUT = np.array([
+    assign_segment(r, f, m) for r in range(1, 6) for f in range(1, 6) for m in range(1, 6)
+])
+
+
+# Equal-frequency binning like pd.qcut, without building a Categorical
+def qcut_scores(x, labels):
+    edges = np.quantile(x, np.linspace(0, 1, len(labels) + 1))[1:-1]
+    # side="left" keeps pd.qcut's right-closed bins: values equal to an edge fall in the lower bin
+    return np.asarray(labels)[np.searchsorted(edges, x, side="left")]
+
+
 def generate_rfm(transactions):
     print("Generating RFM table...")
     rfm = transactions.groupby('Customer ID').agg({
@@ -97,27 +126,19 @@ def generate_rfm(transactions):
     })
 
     # Score each R, F, M column (1=worst, 5=best)
-    rfm['R'] = pd.qcut(rfm['recency'], 5, labels=[5,4,3,2,1]).astype(int)
-    rfm['F'] = pd.qcut(rfm['frequency'].rank(method='first'), 5, labels=[1,2,3,4,5]).astype(int)
-    rfm['M'] = pd.qcut(rfm['monetary'], 5, labels=[1,2,3,4,5]).astype(int)
-
-    rfm['RFM_Score'] = rfm['R'].astype(str) + rfm['F'].astype(str) + rfm['M'].astype(str)
-
-    def assign_segment(score):
-        if score == '555':
-            return 'Champion'
-        elif score[0] == '5':
-            return 'Recent Customer'
-        elif score[1] == '5':
-            return 'Frequent Buyer'
-        elif score[2] == '5':
-            return 'Big Spender'
-        elif score[0] == '1':
-            return 'At Risk'
-        else:
-            return 'Others'
-
-    rfm['Segment'] = rfm['RFM_Score'].apply(assign_segment)
+    rfm['R'] = qcut_scores(rfm['recency'].to_numpy(), [5,4,3,2,1])
+    rfm['F'] = qcut_scores(rfm['frequency'].rank(method='first').to_numpy(), [1,2,3,4,5])
+    rfm['M'] = qcut_scores(rfm['monetary'].to_numpy(), [1,2,3,4,5])
+
+    # Scores are always 1-5, so int8 is enough
+    rfm[['R', 'F', 'M']] = rfm[['R', 'F', 'M']].astype('int8')
+    R, F, M = rfm['R'].to_numpy(), rfm['F'].to_numpy(), rfm['M'].to_numpy()
+
+    # e.g. R=3, F=5, M=5 -> 355, widened first since 555 does not fit in int8
+    rfm['RFM_Score'] = R.astype('int16') * 100 + F * 10 + M
+
+    # One gather from the precomputed table, the largest index (124) still fits in int8
+    rfm['Segment'] = pd.Categorical(SEGMENT_LUT[(R - 1) * 25 + (F - 1) * 5 + (M - 1)])
 
     return rfm
 
@@ -0,0 +1,47 @@
+"""
+Bulk load the exported CSV files in data/ into the Postgres tables.
+Each file is streamed through a single COPY instead of per-row INSERTs.
+Run from the db directory after creating the tables with migration-create-tables.sql.
+"""
+
+import csv
+import os
+import psycopg2
+from psycopg2 import sql
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+TABLES = ["customers", "items", "transactions", "rfm"]
+
+
+def copy_csv(cursor, table: str, path: str):
+    with open(path, newline="") as f:
+        # Use the CSV header as the column list so column order never has to match the table
+        columns = next(csv.reader(f))
+        f.seek(0)
+
+        statement = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT CSV, HEADER)").format(
+            sql.Identifier("public", table),
+            sql.SQL(", ").join(map(sql.Identifier, columns)),
+        )
+        cursor.copy_expert(statement, f)
+
+
+def main():
+    conn = psycopg2.connect(os.getenv("SUPABASE_URI"))
+    try:
+        # All tables load in one transaction, so a failure leaves the database untouched
+        with conn, conn.cursor() as cursor:
+            for table in TABLES:
+                print(f"Loading {table}...")
+                copy_csv(cursor, table, f"data/{table}.csv")
+    finally:
+        conn.close()
+
+    print("Data loaded into Postgres")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,9 @@ create table public.transactions (
   constraint transactions_pkey primary key ("Invoice", "StockCode")
 ) TABLESPACE pg_default;
 
+-- Covers per-customer aggregations (recency, frequency, monetary) with an index-only scan
+create index transactions_customer_id_idx on public.transactions ("Customer ID") include ("InvoiceDate", "TotalPrice");
+
 ALTER TABLE transactions ENABLE ROW LEVEL SECURITY;
 
 create table public.items (
@@ -35,12 +38,15 @@ create table public.rfm (
   recency bigint null,
   frequency bigint null,
   monetary double precision null,
-  "R" bigint null,
-  "F" bigint null,
-  "M" bigint null,
-  "RFM_Score" bigint null,
+  "R" smallint null,
+  "F" smallint null,
+  "M" smallint null,
+  "RFM_Score" smallint null,
   "Segment" text null,
-  constraint rfm_pkey primary key ("Customer ID")
+  constraint rfm_pkey primary key ("Customer ID"),
+  constraint rfm_r_check check ("R" between 1 and 5),
+  constraint rfm_f_check check ("F" between 1 and 5),
+  constraint rfm_m_check check ("M" between 1 and 5)
 ) TABLESPACE pg_default;
 
 ALTER TABLE rfm ENABLE ROW LEVEL SECURITY;
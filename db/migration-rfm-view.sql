@@ -0,0 +1,46 @@
+-- RFM scores computed inside Postgres from the transactions table.
+-- Mirrors generate_rfm() in generate_data_tables.py, with NTILE(5) for the quintiles.
+-- Refresh after loading new transactions:
+--   REFRESH MATERIALIZED VIEW CONCURRENTLY public.rfm_live;
+
+create materialized view public.rfm_live as
+with aggregated as (
+  select
+    "Customer ID",
+    extract(day from '2012-01-01'::timestamptz - max("InvoiceDate"))::bigint as recency,
+    count(*) as frequency,
+    sum("TotalPrice") as monetary
+  from public.transactions
+  where "Customer ID" is not null
+  group by "Customer ID"
+),
+scored as (
+  select
+    *,
+    ntile(5) over (order by recency desc) as "R",
+    ntile(5) over (order by frequency, "Customer ID") as "F",
+    ntile(5) over (order by monetary) as "M"
+  from aggregated
+)
+select
+  "Customer ID",
+  recency,
+  frequency,
+  monetary,
+  "R",
+  "F",
+  "M",
+  "R" * 100 + "F" * 10 + "M" as "RFM_Score",
+  case
+    when "R" = 5 and "F" = 5 and "M" = 5 then 'Champion'
+    when "R" = 5 then 'Recent Customer'
+    when "F" = 5 then 'Frequent Buyer'
+    when "M" = 5 then 'Big Spender'
+    when "R" = 1 then 'At Risk'
+    else 'Others'
+  end as "Segment"
+from scored
+with data;
+
+-- REFRESH ... CONCURRENTLY requires a unique index
+create unique index rfm_live_customer_id_idx on public.rfm_live ("Customer ID");
@@ -37,18 +37,20 @@ async def stream_graph_responses(
                     yield "\n\n"
 
             if message_chunk.tool_call_chunks:
-                tool_chunk = message_chunk.tool_call_chunks[0]
-
-                tool_name = tool_chunk.get("name", "")
-                args = tool_chunk.get("args", "")
-
-                if tool_name:
-                    tool_call_str = f"\n\n< TOOL CALL: {tool_name} >\n\n"
-                if args:
-                    tool_call_str = args
-
-                yield tool_call_str
-            else:
+                # Coalesce every tool call chunk in this message into one emission
+                tool_call_str = ""
+                for tool_chunk in message_chunk.tool_call_chunks:
+                    tool_name = tool_chunk.get("name", "")
+                    args = tool_chunk.get("args", "")
+
+                    if tool_name:
+                        tool_call_str += f"\n\n< TOOL CALL: {tool_name} >\n\n"
+                    if args:
+                        tool_call_str += args
+
+                if tool_call_str:
+                    yield tool_call_str
+            elif message_chunk.content:
                 yield message_chunk.content
             continue
 
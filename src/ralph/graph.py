@@ -15,6 +15,7 @@ from langgraph.checkpoint.memory import MemorySaver
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from ralph.my_mcp.config import mcp_config
 from ralph.prompts import ralph_system_prompt
+from ralph.tools import get_schema, get_rfm_logic
 import json
 
 
@@ -26,29 +27,49 @@ class  AgentState(BaseModel):
         yolo_mode: Whether to skip human review of protected tool calls.
     """
     messages: Annotated[List[BaseMessage], add_messages] = []
-    protected_tools: List[str] = ["create_campaign", "send_campaign_email"]
+    protected_tools: List[str] = [
+        "create_campaign",
+        "send_campaign_email",
+        "send_campaign_emails",
+        "send_templated_campaign_emails"
+    ]
     yolo_mode: bool = False
 
 
+_mcp_tools = None
+
+
+async def get_mcp_tools():
+    """
+    Load the tools from the MCP servers once and reuse them across graph builds.
+    """
+    global _mcp_tools
+    if _mcp_tools is None:
+        client = MultiServerMCPClient(connections=mcp_config["mcpServers"])
+        _mcp_tools = await client.get_tools()
+    return _mcp_tools
+
+
 async def build_graph():
     """
     Build the LangGraph application.
     """
-    client = MultiServerMCPClient(connections=mcp_config["mcpServers"])
-    tools = await client.get_tools()
+    tools = await get_mcp_tools() + [get_schema, get_rfm_logic]
 
     llm = ChatOpenAI(
         model="gpt-4.1-mini-2025-04-14",
-        temperature=0.1
+        temperature=0.1,
+        # Report token usage on streamed responses, including prompt cache hits
+        stream_usage=True
     ).bind_tools(tools)
 
-    def assistant_node(state: AgentState) -> AgentState:
-        response = llm.invoke(
-            [SystemMessage(content=ralph_system_prompt)] +
-            state.messages
-            )
-        state.messages = state.messages + [response]
-        return state
+    # Built once so every call sends a byte-identical prefix (OpenAI prompt caching)
+    system_message = SystemMessage(content=ralph_system_prompt)
+
+    async def assistant_node(state: AgentState) -> dict:
+        response = await llm.ainvoke([system_message] + state.messages)
+        # Return only the new message and let add_messages append it
+        return {"messages": [response]}
     
     def human_tool_review_node(state: AgentState) -> Command[Literal["assistant_node", "tools"]]:
         last_message = state.messages[-1]
@@ -124,8 +145,6 @@ def inspect_graph(graph):
 
 if __name__ == "__main__":
     import asyncio
-    import nest_asyncio
-    nest_asyncio.apply()
 
     graph = asyncio.run(build_graph())
     inspect_graph(graph)
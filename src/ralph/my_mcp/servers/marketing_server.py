@@ -1,8 +1,11 @@
 from mcp.server.fastmcp import FastMCP
 from sqlalchemy import text
+import asyncio
 import os
-import pandas as pd
 from dotenv import load_dotenv
+from jinja2 import StrictUndefined
+from jinja2.sandbox import SandboxedEnvironment
+from pydantic import BaseModel
 from uuid import UUID
 
 load_dotenv()
@@ -15,10 +18,74 @@ load_dotenv()
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-engine = create_engine(url=os.getenv("SUPABASE_URI"))
+# Tool calls arrive sporadically, so validate pooled connections before use and
+# recycle them before the Supabase pooler drops them as idle.
+engine = create_engine(
+    url=os.getenv("SUPABASE_URI"),
+    pool_pre_ping=True,
+    pool_recycle=300,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+# The session API is blocking, so the tools below run these helpers in a worker
+# thread to keep the MCP server's event loop free while Postgres responds.
+
+def _insert_campaign(name: str, type: str, description: str) -> str:
+    with SessionLocal() as session:
+        result = session.execute(
+            text(
+                """
+                INSERT INTO marketing_campaigns (name, type, description)
+                VALUES (:name, :type, :description)
+                RETURNING id
+                """
+            ),
+            {"name": name, "type": type, "description": description},
+        )
+        session.commit()
+        return str(result.fetchone()[0])
+
+
+def _insert_campaign_emails(campaign_id: UUID, emails: list[dict]) -> None:
+    # A list of parameter sets runs as a single executemany in one transaction
+    with SessionLocal() as session:
+        session.execute(
+            text(
+                """
+                INSERT INTO campaign_emails (campaign_id, customer_id, subject, body)
+                VALUES (:campaign_id, :customer_id, :subject, :body)
+                """
+            ),
+            [{"campaign_id": campaign_id, **email} for email in emails],
+        )
+        session.commit()
+
+
+# ----------------------------
+# Email Templates
+# ----------------------------
+
+# Templates are written by the model, so render them sandboxed. Missing variables
+# raise instead of rendering blank. Bodies are HTML, so customer values are escaped.
+body_env = SandboxedEnvironment(autoescape=True, undefined=StrictUndefined)
+subject_env = SandboxedEnvironment(undefined=StrictUndefined)
+
+
+def _render_campaign_emails(subject_template: str, body_template: str, recipients: list[dict]) -> list[dict]:
+    # Compile each template once and render it for every recipient
+    subject = subject_env.from_string(subject_template)
+    body = body_env.from_string(body_template)
+    return [
+        {
+            "customer_id": recipient["customer_id"],
+            "subject": subject.render(**recipient["variables"]),
+            "body": body.render(**recipient["variables"]),
+        }
+        for recipient in recipients
+    ]
+
+
 # ----------------------------
 # MCP Server
 # ----------------------------
@@ -42,19 +109,7 @@ async def create_campaign(
     Returns:
         The ID of the created campaign.
     """
-    with SessionLocal() as session:
-        result = session.execute(
-            text(
-                """
-                INSERT INTO marketing_campaigns (name, type, description)
-                VALUES (:name, :type, :description)
-                RETURNING id
-                """
-            ),
-            {"name": name, "type": type, "description": description},
-        )
-        session.commit()
-        return str(result.fetchone()[0])
+    return await asyncio.to_thread(_insert_campaign, name, type, description)
 
 @mcp.tool()
 async def send_campaign_email(
@@ -77,20 +132,92 @@ async def send_campaign_email(
     # TODO: Send email via MCP
 
     # Create email record in db
-    with SessionLocal() as session:
-        result = session.execute(
-            text(
-                """
-                INSERT INTO campaign_emails (campaign_id, customer_id, subject, body)
-                VALUES (:campaign_id, :customer_id, :subject, :body)
-                """
-            ),
-            {"campaign_id": campaign_id, "customer_id": customer_id, "subject": subject, "body": body},
-        )
-        session.commit()
+    await asyncio.to_thread(
+        _insert_campaign_emails,
+        campaign_id,
+        [{"customer_id": customer_id, "subject": subject, "body": body}],
+    )
 
     return f"Successfully sent <{subject}> to customer <{customer_id}>!"
 
 
+class CampaignEmail(BaseModel):
+    """A personalized campaign email for a single customer."""
+    customer_id: int
+    subject: str
+    body: str
+
+
+@mcp.tool()
+async def send_campaign_emails(
+    campaign_id: UUID,
+    emails: list[CampaignEmail],
+) -> str:
+    """Send a batch of campaign emails in a single call.
+    
+    Args:
+        campaign_id: The ID of the campaign.
+        emails: The emails to send, one per customer, each with its own subject and body.
+
+    Returns:
+        A confirmation of how many emails were sent.
+    """
+    if not emails:
+        return "No emails to send."
+
+    # TODO: Send emails via MCP
+
+    # Create all email records in db in one round trip
+    await asyncio.to_thread(
+        _insert_campaign_emails,
+        campaign_id,
+        [email.model_dump() for email in emails],
+    )
+
+    return f"Successfully sent {len(emails)} emails for campaign <{campaign_id}>!"
+
+
+class TemplateRecipient(BaseModel):
+    """A customer and the values that fill in the email template for them."""
+    customer_id: int
+    variables: dict
+
+
+@mcp.tool()
+async def send_templated_campaign_emails(
+    campaign_id: UUID,
+    subject_template: str,
+    body_template: str,
+    recipients: list[TemplateRecipient],
+) -> str:
+    """Render one email template for many customers and send the results.
+    
+    Args:
+        campaign_id: The ID of the campaign.
+        subject_template: The subject line as a Jinja template, e.g. "We miss you, {{ name }}!".
+        body_template: The HTML body as a Jinja template using {{ ... }} placeholders.
+        recipients: The customers to email, each with the variables used to fill in the templates.
+
+    Returns:
+        A confirmation of how many emails were sent.
+    """
+    if not recipients:
+        return "No emails to send."
+
+    emails = await asyncio.to_thread(
+        _render_campaign_emails,
+        subject_template,
+        body_template,
+        [recipient.model_dump() for recipient in recipients],
+    )
+
+    # TODO: Send emails via MCP
+
+    # Create all email records in db in one round trip
+    await asyncio.to_thread(_insert_campaign_emails, campaign_id, emails)
+
+    return f"Successfully sent {len(emails)} emails for campaign <{campaign_id}>!"
+
+
 if __name__ == "__main__":
     mcp.run(transport="stdio")
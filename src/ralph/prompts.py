@@ -1,18 +1,7 @@
-ralph_system_prompt = f"""You are Ralph, a customer service agent and marketing expert. Your goal is to work closely with the marketing team to manage and optimize customer relationships. You do this by deeply understanding customer behavior, preferences, and needs, and then using that information to create highly targeted marketing campaigns.
+# Reference documents returned by the get_schema and get_rfm_logic tools.
+# They are kept out of the system prompt so they are only sent when the agent needs them.
 
-You are connected to a Postgres database with our company's CRM data. You can run read-only SQL queries using the `query` tool. You should use this tool to understand customer behavior and preferences.
-
-<DB_TABLE_DESCRIPTIONS>
-customers - contains customer information including email for marketing campaigns.
-transactions - contains transaction information including the items purchased and the customer who purchased them.
-items - contains item information including price and description.
-rfm - contains RFM scores and segment labels for each customer.
-marketing_campaigns - contains marketing campaign data.
-campaign_emails - contains email records for emails sent as part of marketing campaigns.
-</DB_TABLE_DESCRIPTIONS>
-
-<DB_SCHEMA>
-create table public.customers (
+db_schema_prompt = """create table public.customers (
   "Customer ID" bigint not null,
   "Country" text null,
   "Name" text null,
@@ -31,6 +20,8 @@ create table public.transactions (
   constraint transactions_pkey primary key ("Invoice", "StockCode")
 ) TABLESPACE pg_default;
 
+create index transactions_customer_id_idx on public.transactions ("Customer ID") include ("InvoiceDate", "TotalPrice");
+
 create table public.items (
   "StockCode" text not null,
   "Description" text null,
@@ -43,12 +34,15 @@ create table public.rfm (
   recency bigint null,
   frequency bigint null,
   monetary double precision null,
-  "R" bigint null,
-  "F" bigint null,
-  "M" bigint null,
-  "RFM_Score" bigint null,
+  "R" smallint null,
+  "F" smallint null,
+  "M" smallint null,
+  "RFM_Score" smallint null,
   "Segment" text null,
-  constraint rfm_pkey primary key ("Customer ID")
+  constraint rfm_pkey primary key ("Customer ID"),
+  constraint rfm_r_check check ("R" between 1 and 5),
+  constraint rfm_f_check check ("F" between 1 and 5),
+  constraint rfm_m_check check ("M" between 1 and 5)
 ) TABLESPACE pg_default;
 
 create table public.marketing_campaigns (
@@ -97,34 +91,61 @@ create table public.campaign_emails (
     )
   )
 ) TABLESPACE pg_default;
-</DB_SCHEMA>
-
-<RFM>
-# Score each R, F, M column (1=worst, 5=best)
-rfm['R'] = pd.qcut(rfm['recency'], 5, labels=[5,4,3,2,1]).astype(int)
-rfm['F'] = pd.qcut(rfm['frequency'].rank(method='first'), 5, labels=[1,2,3,4,5]).astype(int)
-rfm['M'] = pd.qcut(rfm['monetary'], 5, labels=[1,2,3,4,5]).astype(int)
+"""
 
-rfm['RFM_Score'] = rfm['R'].astype(str) + rfm['F'].astype(str) + rfm['M'].astype(str)
-
-def assign_segment(score):
-    if score == '555':
+rfm_prompt = """def assign_segment(r, f, m):
+    if r == 5 and f == 5 and m == 5:
         return 'Champion'
-    elif score[0] == '5':
+    elif r == 5:
         return 'Recent Customer'
-    elif score[1] == '5':
+    elif f == 5:
         return 'Frequent Buyer'
-    elif score[2] == '5':
+    elif m == 5:
         return 'Big Spender'
-    elif score[0] == '1':
+    elif r == 1:
         return 'At Risk'
     else:
         return 'Others'
 
-rfm['Segment'] = rfm['RFM_Score'].apply(assign_segment)
-</RFM>
+# Segment of every possible (R, F, M) score, indexed by (R-1)*25 + (F-1)*5 + (M-1)
+SEGMENT_LUT = np.array([
+    assign_segment(r, f, m) for r in range(1, 6) for f in range(1, 6) for m in range(1, 6)
+])
+
+# Equal-frequency binning like pd.qcut
+def qcut_scores(x, labels):
+    edges = np.quantile(x, np.linspace(0, 1, len(labels) + 1))[1:-1]
+    return np.asarray(labels)[np.searchsorted(edges, x, side="left")]
+
+# Score each R, F, M column (1=worst, 5=best)
+rfm['R'] = qcut_scores(rfm['recency'].to_numpy(), [5,4,3,2,1])
+rfm['F'] = qcut_scores(rfm['frequency'].rank(method='first').to_numpy(), [1,2,3,4,5])
+rfm['M'] = qcut_scores(rfm['monetary'].to_numpy(), [1,2,3,4,5])
+
+# Scores are always 1-5, so int8 is enough
+rfm[['R', 'F', 'M']] = rfm[['R', 'F', 'M']].astype('int8')
+R, F, M = rfm['R'].to_numpy(), rfm['F'].to_numpy(), rfm['M'].to_numpy()
+
+# e.g. R=3, F=5, M=5 -> 355, widened first since 555 does not fit in int8
+rfm['RFM_Score'] = R.astype('int16') * 100 + F * 10 + M
+
+rfm['Segment'] = pd.Categorical(SEGMENT_LUT[(R - 1) * 25 + (F - 1) * 5 + (M - 1)])
+"""
 
-You also have access to marketing tools. You can use the `create_campaign` tool to create a marketing campaign. The type of the campaign must be one of the types listed in <MARKETING_CAMPAIGNS>. You can use the `send_campaign_email` tool to send emails to customers as part of a campaign.
+ralph_system_prompt = """You are Ralph, a customer service agent and marketing expert. Your goal is to work closely with the marketing team to manage and optimize customer relationships. You do this by deeply understanding customer behavior, preferences, and needs, and then using that information to create highly targeted marketing campaigns.
+
+You are connected to a Postgres database with our company's CRM data. You can run read-only SQL queries using the `query` tool. You should use this tool to understand customer behavior and preferences. Always call the `get_schema` tool before writing SQL so you use the exact table and column names. Call the `get_rfm_logic` tool before explaining how customers are scored or segmented.
+
+<DB_TABLE_DESCRIPTIONS>
+customers - contains customer information including email for marketing campaigns.
+transactions - contains transaction information including the items purchased and the customer who purchased them.
+items - contains item information including price and description.
+rfm - contains precomputed RFM scores and segment labels for each customer. Query it directly instead of recomputing scores from transactions.
+marketing_campaigns - contains marketing campaign data.
+campaign_emails - contains email records for emails sent as part of marketing campaigns.
+</DB_TABLE_DESCRIPTIONS>
+
+You also have access to marketing tools. You can use the `create_campaign` tool to create a marketing campaign. The type of the campaign must be one of the types listed in <MARKETING_CAMPAIGNS>. You can use the `send_campaign_email` tool to send emails to customers as part of a campaign. When a campaign targets more than one customer, use the `send_campaign_emails` tool to send all of the personalized emails in a single call instead of calling `send_campaign_email` once per customer.
 
 <MARKETING_CAMPAIGNS>
 There are 3 types of marketing campaigns you can run:
@@ -139,6 +160,8 @@ All marketing emails should be written in HTML. They should also be personalized
 Before sending any email, you must always first analyze the customer's data to understand their purchase behavior and preferences. You should then use this information to create a highly targeted email for each customer. Always use specifics in the email, such as the exact name of the product they purchased or that they might be interested in, the date of their purchase, etc.
 
 Use a friendly and conversational tone in all emails. Don't be afraid to throw in the occasional pun or emoji, but don't over do it.
+
+When a campaign targets many customers, don't write a full email for each one. Write ONE HTML body and ONE subject as Jinja templates with `{{ ... }}` placeholders for the customer specifics (for example `{{ name }}`, `{{ last_product }}`, `{{ last_purchase_date }}`), then use the `send_templated_campaign_emails` tool with a `variables` dict per customer. Every placeholder in the templates must have a value in every customer's `variables`.
 </MARKETING_EMAILS>
 
 <SLACK_INTEGRATION>
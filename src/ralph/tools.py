@@ -0,0 +1,26 @@
+"""
+Local tools that serve reference documents to the agent on demand.
+"""
+
+from langchain_core.tools import tool
+from ralph.prompts import db_schema_prompt, rfm_prompt
+
+
+@tool
+def get_schema() -> str:
+    """Get the SQL schema of every table in the CRM database.
+
+    Returns:
+        The create table statements for all tables.
+    """
+    return db_schema_prompt
+
+
+@tool
+def get_rfm_logic() -> str:
+    """Get the code used to compute the RFM scores and segments in the rfm table.
+
+    Returns:
+        The Python code that scores R, F and M and assigns each customer's segment.
+    """
+    return rfm_prompt